@@ -1,13 +1,31 @@
-from flask import Flask, jsonify, render_template, request
-import sqlite3
+import startup
+import atexit
+import click
+import json
+from flask import Flask, Response, jsonify, render_template, request
 import paho.mqtt.client as mqtt
 from datetime import datetime
 import threading
-from fuzzy_logic import FuzzyWateringSystem
 from flask_apscheduler import APScheduler
 import logging
 from contextlib import closing
 from pytz import timezone
+from backfill import DEFAULT_CHUNK_SIZE, backfill_recommendations
+from compression import ResponseCompressor, StaticAssets, build_static_assets
+from conditional import conditional_get
+from datatables import datatables_page
+from database import Database, epoch_seconds, epoch_timestamp
+from export import FORMATS, export_readings
+from ingest import IngestWriter
+from json_provider import install_json_provider
+from latest import LatestReadings, Reading
+from migrations import run_migrations
+from pubsub import Broadcaster
+from response_cache import MemoryStore, ResponseCache, SQLiteStore
+from rollup import METRICS, choose_resolution, query_rollups, refresh_rollups
+from stats import count_readings, read_stats, rebuild_stats, verify_stats
+
+startup.mark("app imports")
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO)
@@ -20,16 +38,95 @@ class Config:
 MQTT_BROKER = "103.127.134.201"
 MQTT_TOPIC_SENSOR = "esp32/sensor_data"
 MQTT_TOPIC_CONTROL = "esp32/watering_control"
+SENSOR_DEVICE = MQTT_TOPIC_SENSOR.split("/")[0]  # Device whose readings sensor_data holds
 MQTT_USERNAME = "kayvsan"
 MQTT_PASSWORD = "(Malang439)"
 DATABASE = "sensor_data.db"
 MQTT_PORT = 1883
 MQTT_KEEPALIVE = 60
+FUZZY_COMPILED = False  # Interpolate from a precomputed lookup table; pays off mainly for batches
+FUZZY_ARTIFACT_DIR = "fuzzy_cache"  # Where the compiled lookup table is kept between runs
+FUZZY_EXECUTOR_WORKERS = 0  # Run recommendations in this many worker processes (0 = in-process)
+FUZZY_EXECUTOR_TIMEOUT = 5.0  # Seconds to wait for a worker before giving up
+INGEST_BATCH_SIZE = 500  # Readings written per transaction
+INGEST_FLUSH_INTERVAL = 0.2  # Seconds a reading may wait before a partial batch is written
+INGEST_QUEUE_SIZE = 10000  # Readings buffered before new ones are dropped
+ROLLUP_REFRESH_SECONDS = 60  # How often new readings are folded into the rollup tables
+HISTORY_DEFAULT_POINTS = 500  # Point budget for /api/history when none is given
+HISTORY_MAX_POINTS = 5000
+HISTORY_METHODS = ("rollup", "lttb", "minmax")  # rollup buckets, or decimated raw readings
+PAGE_DEFAULT_LIMIT = 100  # Rows per /api/all page when no limit is given
+PAGE_MAX_LIMIT = 1000
+COLUMNAR_MAX_LIMIT = 50000  # Columnar /api/all pages are compact enough to be much larger
+COMPRESS_THRESHOLD = 1024  # Smallest response body worth compressing, in bytes
+STATIC_BUILD_DIR = "static_build"  # Output of `flask build-assets`: hashed, precompressed static files
+JSON_PROVIDER = "auto"  # "orjson" (fast, optional dependency), "stdlib" or "auto" for the fastest available
+STREAM_HEARTBEAT_SECONDS = 15  # Comment line sent to idle /api/stream clients
+STREAM_HISTORY = 1000  # Events kept for Last-Event-ID resume
+STREAM_CLIENT_BUFFER = 100  # Events buffered per client before it is dropped
+RESPONSE_CACHE_TTL = 60  # Seconds a cached /api/stats, /api/all or /api/history body may be served
+RESPONSE_CACHE_SIZE = 256  # Cached responses kept
+RESPONSE_CACHE_PATH = None  # SQLite file to share the cache between worker processes (None = in-process)
+SENSOR_FIELDS = ("id", "timestamp", "temperature", "humidity", "soil_moisture")
+
+# Modules imported (in this order) when the fuzzy engine is first needed
+FUZZY_IMPORTS = ("numpy", "scipy", "networkx", "skfuzzy", "fuzzy_logic")
 
 # Initialize Flask and components
 app = Flask(__name__)
 app.config.from_object(Config)
-fuzzy_system = FuzzyWateringSystem()
+install_json_provider(app, JSON_PROVIDER)
+ResponseCompressor(app, COMPRESS_THRESHOLD)
+static_assets = StaticAssets(app, STATIC_BUILD_DIR)
+
+# The fuzzy engine pulls in numpy/scipy/networkx/scikit-fuzzy, so it is built
+# on first use (or by warm_fuzzy_system) rather than at import time
+_fuzzy_system = None
+_fuzzy_executor = None
+_fuzzy_lock = threading.Lock()
+
+# Pooled, tuned SQLite connections (WAL mode)
+db = Database(DATABASE)
+
+# Sensor readings are queued by the MQTT callback and written in batches
+ingest_writer = IngestWriter(db, INGEST_BATCH_SIZE, INGEST_FLUSH_INTERVAL, INGEST_QUEUE_SIZE)
+
+def load_latest_reading(device):
+    """Read the newest stored reading; only used to seed latest_readings."""
+    with db.reader() as conn:
+        row = conn.execute(
+            "SELECT timestamp, ts_epoch, temperature, humidity, soil_moisture FROM sensor_data "
+            "ORDER BY ts_epoch DESC, id DESC LIMIT 1"
+        ).fetchone()
+    return Reading(*row) if row else None
+
+# Aggregate responses are cached until the next committed batch (or their TTL)
+response_cache = ResponseCache(
+    SQLiteStore(RESPONSE_CACHE_PATH, RESPONSE_CACHE_SIZE) if RESPONSE_CACHE_PATH else MemoryStore(RESPONSE_CACHE_SIZE),
+    RESPONSE_CACHE_TTL
+)
+ingest_writer.add_listener(response_cache.invalidate)
+
+def data_version():
+    """Latest committed reading id and commit time, for conditional GETs."""
+    return ingest_writer.version
+
+def snapshot_version():
+    """Version of the in-memory latest readings, which move ahead of commits."""
+    return latest_readings.version
+
+def stats_version():
+    """/api/stats mixes committed totals with the latest-reading snapshot."""
+    committed, snapshot = ingest_writer.version, latest_readings.version
+    if committed is None or snapshot is None:
+        return None
+    return f"{committed[0]}.{snapshot[0]}", max(committed[1], snapshot[1])
+
+# Latest reading per device, updated by on_message
+latest_readings = LatestReadings(load_latest_reading)
+
+# New readings are pushed to /api/stream clients as they arrive
+live_readings = Broadcaster(STREAM_HISTORY, STREAM_CLIENT_BUFFER)
 
 # Initialize MQTT Client
 mqtt_client = mqtt.Client()
@@ -39,9 +136,52 @@ mqtt_client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
 scheduler = APScheduler()
 scheduler.init_app(app)
 
+def get_fuzzy_system():
+    """Return the shared fuzzy engine, importing and building it on first use."""
+    global _fuzzy_system
+    if _fuzzy_system is None:
+        with _fuzzy_lock:
+            if _fuzzy_system is None:
+                with startup.phase("fuzzy engine imports"):
+                    modules = [startup.timed_import(name) for name in FUZZY_IMPORTS]
+                with startup.phase("fuzzy engine build"):
+                    _fuzzy_system = modules[-1].FuzzyWateringSystem(**fuzzy_options())
+    return _fuzzy_system
+
+def fuzzy_options():
+    return {"compiled": FUZZY_COMPILED, "artifact_dir": FUZZY_ARTIFACT_DIR}
+
+def get_fuzzy_executor():
+    """Return the worker-process pool, starting it on first use."""
+    global _fuzzy_executor
+    if _fuzzy_executor is None:
+        with _fuzzy_lock:
+            if _fuzzy_executor is None:
+                from fuzzy_executor import FuzzyExecutor
+                _fuzzy_executor = FuzzyExecutor(FUZZY_EXECUTOR_WORKERS, fuzzy_options(), FUZZY_EXECUTOR_TIMEOUT)
+    return _fuzzy_executor
+
+def calculate_recommendation(soil, hum, temp):
+    """Watering recommendation, computed in a worker process when FUZZY_EXECUTOR_WORKERS > 0."""
+    if FUZZY_EXECUTOR_WORKERS > 0:
+        return get_fuzzy_executor().calculate_watering(soil, hum, temp)
+    return get_fuzzy_system().calculate_watering(soil, hum, temp)
+
+def warm_fuzzy_system():
+    """Build the fuzzy engine in the background so the first request doesn't pay for it."""
+    try:
+        if FUZZY_EXECUTOR_WORKERS > 0:
+            with startup.phase("fuzzy workers warm-up"):
+                get_fuzzy_executor().warm()
+        else:
+            get_fuzzy_system()
+        logger.info(f"Fuzzy engine ready: {startup.report()}")
+    except Exception as e:
+        logger.error(f"Fuzzy engine warm-up failed: {e}")
+
 def init_db():
-    """Initialize the database with required tables."""
-    with closing(sqlite3.connect(DATABASE)) as conn:
+    """Initialize the database with required tables and apply pending migrations."""
+    with closing(db.connect()) as conn:
         with conn:
             conn.execute('''CREATE TABLE IF NOT EXISTS sensor_data
                          (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -49,7 +189,23 @@ def init_db():
                           temperature REAL,
                           humidity REAL,
                           soil_moisture INTEGER)''')
-            logger.info("Database initialized")
+        version = run_migrations(conn)
+    logger.info(f"Database initialized (schema version {version})")
+
+def update_rollups():
+    """Fold readings stored since the last run into the rollup tables."""
+    try:
+        with closing(db.connect()) as conn:
+            if refresh_rollups(conn):
+                response_cache.invalidate()
+    except Exception as e:
+        logger.error(f"Rollup refresh error: {e}")
+
+def parse_time_arg(value):
+    """Accept epoch seconds or a 'YYYY-MM-DD[ HH:MM:SS]' local timestamp."""
+    if value.isdigit():
+        return int(value)
+    return epoch_seconds(datetime.fromisoformat(value))
 
 # MQTT Callbacks
 def on_connect(client, userdata, flags, rc):
@@ -63,15 +219,14 @@ def on_message(client, userdata, msg):
     try:
         if msg.topic == MQTT_TOPIC_SENSOR:
             temp, hum, soil = msg.payload.decode().split(',')
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            now = datetime.now()
+            reading = Reading(now.strftime("%Y-%m-%d %H:%M:%S"), epoch_seconds(now),
+                              float(temp), float(hum), int(soil))
             
-            with closing(sqlite3.connect(DATABASE)) as conn:
-                with conn:
-                    conn.execute(
-                        "INSERT INTO sensor_data (timestamp, temperature, humidity, soil_moisture) VALUES (?, ?, ?, ?)",
-                        (timestamp, float(temp), float(hum), int(soil))
-                    )
-            logger.info(f"Saved sensor data: {temp}°C, {hum}%, {soil}%")
+            if ingest_writer.submit(reading):
+                latest_readings.update(SENSOR_DEVICE, reading)
+                live_readings.publish(reading_payload(reading))
+                logger.debug(f"Queued sensor data: {temp}°C, {hum}%, {soil}%")
             
     except Exception as e:
         logger.error(f"Error processing MQTT message: {e}")
@@ -90,20 +245,14 @@ def mqtt_thread():
 def proses_data():
     """Process the latest sensor data and determine watering needs."""
     try:
-        with closing(sqlite3.connect(DATABASE)) as conn:
-            with conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT temperature, humidity, soil_moisture FROM sensor_data ORDER BY timestamp DESC LIMIT 1"
-                )
-                row = cursor.fetchone()
+        reading = latest_readings.get(SENSOR_DEVICE)
         
-        if not row:
+        if not reading:
             logger.warning("No sensor data available")
             return None, None, None, {"error": "No data available"}
         
-        temp, hum, soil = row
-        result = fuzzy_system.calculate_watering(soil, hum, temp)
+        temp, hum, soil = reading.temperature, reading.humidity, reading.soil_moisture
+        result = calculate_recommendation(soil, hum, temp)
         
         if result.get('duration_ms', 0) > 0:
             mqtt_client.publish(MQTT_TOPIC_CONTROL, f"ON,{result['duration_ms']}")
@@ -115,26 +264,23 @@ def proses_data():
         logger.error(f"Error processing data: {e}")
         return None, None, None, {"error": str(e)}
     
+def reading_payload(reading):
+    return {
+        "timestamp": reading.timestamp,
+        "temperature": reading.temperature,
+        "humidity": reading.humidity,
+        "soil_moisture": reading.soil_moisture
+    }
+
 def get_latest_sensor_data():
-    """Fetch the latest sensor data from the database."""
+    """Fetch the latest sensor data from the in-memory snapshot."""
     try:
-        with closing(sqlite3.connect(DATABASE)) as conn:
-            with conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT timestamp, temperature, humidity, soil_moisture FROM sensor_data ORDER BY timestamp DESC LIMIT 1"
-                )
-                row = cursor.fetchone()
+        reading = latest_readings.get(SENSOR_DEVICE)
         
-        if not row:
+        if not reading:
             return None
         
-        return {
-            "timestamp": row[0],
-            "temperature": row[1],
-            "humidity": row[2],
-            "soil_moisture": row[3]
-        }
+        return reading_payload(reading)
     
     except Exception as e:
         logger.error(f"Error fetching latest sensor data: {e}")
@@ -144,12 +290,10 @@ def get_latest_sensor_data():
 @app.route('/table')
 def dashboard():
     try:
-        with closing(sqlite3.connect(DATABASE)) as conn:
-            with conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM sensor_data ORDER BY timestamp DESC")
-                data = cursor.fetchall()
-        return render_template('table.html', data=data)
+        # Rows are loaded page by page from /api/datatables
+        with db.reader() as conn:
+            total_records = count_readings(conn)
+        return render_template('table.html', total_records=total_records)
     except Exception as e:
         logger.error(f"Dashboard error: {e}")
         return render_template('error.html', error=str(e))
@@ -157,42 +301,37 @@ def dashboard():
 @app.route('/')
 def index():
     try:
-        with closing(sqlite3.connect(DATABASE)) as conn:
-            with conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM sensor_data ORDER BY timestamp DESC")
-                data = cursor.fetchall()
+        with db.reader() as conn:
+            total_records = count_readings(conn)
         sensor_data = get_latest_sensor_data()
-        return render_template('index.html', sensor_data=sensor_data, data=data)
+        return render_template('index.html', sensor_data=sensor_data, total_records=total_records)
     except Exception as e:
         logger.error(f"Index error: {e}")
         return render_template('error.html', error=str(e))
 
+@app.route('/api/datatables')
+def get_datatables_page():
+    """Serve one page of sensor data using the DataTables server-side protocol."""
+    try:
+        with db.reader() as conn:
+            return jsonify(datatables_page(conn, request.args, count_readings(conn), PAGE_MAX_LIMIT))
+    except Exception as e:
+        logger.error(f"DataTables error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/current')
+@conditional_get(snapshot_version)
 def get_current_data():
     """Get the latest sensor data only."""
     try:
-        with closing(sqlite3.connect(DATABASE)) as conn:
-            with conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT timestamp, temperature, humidity, soil_moisture FROM sensor_data ORDER BY timestamp DESC LIMIT 1"
-                )
-                row = cursor.fetchone()
+        sensor_data = get_latest_sensor_data()
         
-        if not row:
+        if not sensor_data:
             return jsonify({"error": "No sensor data available"}), 404
         
-        timestamp, temperature, humidity, soil_moisture = row
-        
         return jsonify({
             "status": "success",
-            "sensor_data": {
-                "timestamp": timestamp,
-                "temperature": temperature,
-                "humidity": humidity,
-                "soil_moisture": soil_moisture
-            }
+            "sensor_data": sensor_data
         })
     
     except Exception as e:
@@ -203,19 +342,13 @@ def get_current_data():
 def get_current_with_recommendation():
     """Get the latest sensor data with watering recommendation."""
     try:
-        with closing(sqlite3.connect(DATABASE)) as conn:
-            with conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT temperature, humidity, soil_moisture FROM sensor_data ORDER BY timestamp DESC LIMIT 1"
-                )
-                row = cursor.fetchone()
+        reading = latest_readings.get(SENSOR_DEVICE)
         
-        if not row:
+        if not reading:
             return jsonify({"error": "No sensor data available"}), 404
         
-        temp, hum, soil = row
-        result = fuzzy_system.calculate_watering(soil, hum, temp)
+        temp, hum, soil = reading.temperature, reading.humidity, reading.soil_moisture
+        result = calculate_recommendation(soil, hum, temp)
         
         response_data = {
             "status": "success",
@@ -241,35 +374,104 @@ def get_current_with_recommendation():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/all')
+@conditional_get(data_version)
+@response_cache.cached
 def get_all_data():
-    """Get all sensor data."""
+    """Get sensor data one page at a time, newest first.
+
+    Pages are keyed on id: pass a response's next_cursor as before_id to
+    get older rows, or its prev_cursor as after_id to get newer ones.
+    With format=columnar, data holds one list per field instead of one
+    object per row.
+    """
+    columnar = request.args.get('format') == 'columnar'
+    try:
+        limit = min(request.args.get('limit', PAGE_DEFAULT_LIMIT, type=int),
+                    COLUMNAR_MAX_LIMIT if columnar else PAGE_MAX_LIMIT)
+        after_id = request.args.get('after_id', type=int)
+        before_id = request.args.get('before_id', type=int)
+        fields = request.args['fields'].split(',') if 'fields' in request.args else list(SENSOR_FIELDS)
+        start = parse_time_arg(request.args['from']) if 'from' in request.args else None
+        end = parse_time_arg(request.args['to']) if 'to' in request.args else None
+    except ValueError as e:
+        return jsonify({"error": f"Invalid parameter: {e}"}), 400
+    
+    if limit < 1 or any(f not in SENSOR_FIELDS for f in fields):
+        return jsonify({"error": f"limit must be positive and fields one of {', '.join(SENSOR_FIELDS)}"}), 400
+    
+    # id is always returned since the cursors are built from it
+    columns = ["id"] + [f for f in fields if f != "id"]
+    conditions, params = [], []
+    if after_id is not None:
+        conditions.append("id > ?")
+        params.append(after_id)
+    if before_id is not None:
+        conditions.append("id < ?")
+        params.append(before_id)
+    if start is not None:
+        conditions.append("ts_epoch >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("ts_epoch < ?")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Walking up from after_id reads the rows nearest the cursor first
+    order = "ASC" if after_id is not None and before_id is None else "DESC"
+    
     try:
-        with closing(sqlite3.connect(DATABASE)) as conn:
-            with conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM sensor_data ORDER BY timestamp DESC")
-                data = cursor.fetchall()
+        with db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM sensor_data {where} ORDER BY id {order} LIMIT ?",
+                params + [limit + 1]
+            )
+            rows = cursor.fetchall()
+            total_records = count_readings(conn)
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if order == "ASC":
+            rows.reverse()
         
-        # Convert to list of dictionaries
-        result = []
-        for row in data:
-            result.append({
-                "id": row[0],
-                "timestamp": row[1],
-                "temperature": row[2],
-                "humidity": row[3],
-                "soil_moisture": row[4]
-            })
+        if columnar:
+            values = list(zip(*rows)) if rows else [()] * len(columns)
+            result = {name: list(column) for name, column in zip(columns, values)}
+        else:
+            result = [dict(zip(columns, row)) for row in rows]
+        older = has_more if order == "DESC" else True
+        newer = has_more if order == "ASC" else before_id is not None
         
         return jsonify({
             "status": "success",
-            "total_records": len(result),
+            "total_records": total_records,
+            "count": len(rows),
+            "next_cursor": rows[-1][0] if rows and older else None,
+            "prev_cursor": rows[0][0] if rows and newer else None,
             "data": result
         })
     except Exception as e:
         logger.error(f"Get all data error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/export')
+def export_data():
+    """Stream sensor data as NDJSON or CSV, optionally gzip-compressed."""
+    fmt = request.args.get('format', 'ndjson')
+    compress = request.args.get('gzip', '0').lower() in ('1', 'true', 'yes')
+    try:
+        start = parse_time_arg(request.args['from']) if 'from' in request.args else None
+        end = parse_time_arg(request.args['to']) if 'to' in request.args else None
+    except ValueError as e:
+        return jsonify({"error": f"Invalid parameter: {e}"}), 400
+    
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(FORMATS)}"}), 400
+    
+    headers = {"Content-Disposition": f"attachment; filename=sensor_data.{fmt}"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return Response(export_readings(db, fmt, start, end, compress), mimetype=FORMATS[fmt], headers=headers)
+
 @app.route('/api/water/activate', methods=['POST'])
 def activate_water():
     """Activate watering manually."""
@@ -289,45 +491,74 @@ def activate_water():
         logger.error(f"Activate water error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/ingest/stats')
+def get_ingest_stats():
+    """Get write-behind ingest queue and batch statistics."""
+    return jsonify({"status": "success", "ingest": ingest_writer.stats(), "stream": live_readings.stats()})
+
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """Get response cache hit rates."""
+    return jsonify({"status": "success", "cache": response_cache.stats()})
+
+@app.route('/api/stream')
+def stream_sensor_data():
+    """Push new sensor readings to the client as Server-Sent Events."""
+    last_event_id = request.headers.get('Last-Event-ID')
+    
+    def format_event(event_id, data):
+        id_line = f"id: {event_id}\n" if event_id else ""
+        return f"{id_line}event: reading\ndata: {json.dumps(data)}\n\n"
+    
+    def events():
+        # Subscribe only once the stream starts: a response that is never
+        # iterated never runs the finally below and would leak the subscription
+        subscription, resumed = live_readings.subscribe(last_event_id)
+        try:
+            yield "retry: 5000\n\n"
+            # Clients that cannot be caught up start from the current reading
+            sensor_data = get_latest_sensor_data()
+            if not resumed and sensor_data:
+                yield format_event(None, sensor_data)
+            while not subscription.dropped:
+                event = subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                yield format_event(*event) if event else ": heartbeat\n\n"
+            logger.info("Dropped slow /api/stream client")
+        finally:
+            live_readings.unsubscribe(subscription)
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/startup')
+def get_startup_report():
+    """Get cold-start timings (imports and setup steps)."""
+    return jsonify({"status": "success", "startup": startup.report()})
+
 @app.route('/api/stats')
+@conditional_get(stats_version)
+# The latest reading comes from the snapshot, which moves even when a batch fails to commit
+@response_cache.cached(vary=lambda: latest_readings.version)
 def get_stats():
     """Get statistics of sensor data."""
     try:
-        with closing(sqlite3.connect(DATABASE)) as conn:
-            with conn:
-                cursor = conn.cursor()
-                
-                # Get latest data
-                cursor.execute("SELECT temperature, humidity, soil_moisture FROM sensor_data ORDER BY timestamp DESC LIMIT 1")
-                latest = cursor.fetchone()
-                
-                # Get averages
-                cursor.execute("SELECT AVG(temperature), AVG(humidity), AVG(soil_moisture) FROM sensor_data")
-                averages = cursor.fetchone()
-                
-                # Get counts
-                cursor.execute("SELECT COUNT(*) FROM sensor_data")
-                total_count = cursor.fetchone()[0]
-                
-                # Get today's count
-                today = datetime.now().strftime("%Y-%m-%d")
-                cursor.execute("SELECT COUNT(*) FROM sensor_data WHERE timestamp LIKE ?", (f"{today}%",))
-                today_count = cursor.fetchone()[0]
+        # Running totals kept up to date by the sensor_data triggers
+        with db.reader() as conn:
+            total_count, averages, today_count = read_stats(conn, datetime.now().strftime("%Y-%m-%d"))
         
+        latest = latest_readings.get(SENSOR_DEVICE)
         if not latest:
             return jsonify({"error": "No data available"}), 404
             
         return jsonify({
             "status": "success",
             "latest": {
-                "temperature": latest[0],
-                "humidity": latest[1],
-                "soil_moisture": latest[2]
+                "temperature": latest.temperature,
+                "humidity": latest.humidity,
+                "soil_moisture": latest.soil_moisture
             },
             "averages": {
-                "temperature": round(averages[0], 2) if averages[0] else 0,
-                "humidity": round(averages[1], 2) if averages[1] else 0,
-                "soil_moisture": round(averages[2], 2) if averages[2] else 0
+                name: round(value, 2) if value else 0 for name, value in averages.items()
             },
             "counts": {
                 "total": total_count,
@@ -339,10 +570,142 @@ def get_stats():
         logger.error(f"Get stats error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/history')
+@response_cache.cached
+def get_history():
+    """Get a time range of sensor data as at most `points` points per series.
+
+    method=rollup (default) returns min/max/avg per bucket from the rollup
+    tables; method=lttb or method=minmax decimates the raw readings.
+    """
+    method = request.args.get('method', 'rollup')
+    try:
+        end = parse_time_arg(request.args['to']) if 'to' in request.args else epoch_seconds(datetime.now())
+        start = parse_time_arg(request.args['from']) if 'from' in request.args else end - 86400
+        points = min(request.args.get('points', HISTORY_DEFAULT_POINTS, type=int), HISTORY_MAX_POINTS)
+        metrics = request.args['metric'].split(',') if 'metric' in request.args else list(METRICS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid parameter: {e}"}), 400
+    
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown or points < 1 or start >= end or method not in HISTORY_METHODS:
+        return jsonify({"error": "Invalid metric, method, points or time range"}), 400
+    
+    if method != 'rollup':
+        return get_decimated_history(start, end, points, metrics, method)
+    
+    try:
+        resolution = choose_resolution(start, end, points)
+        with db.reader() as conn:
+            buckets = [
+                {
+                    "timestamp": epoch_timestamp(bucket),
+                    "count": count,
+                    **{m: {"min": low, "max": high, "avg": round(avg, 2) if avg is not None else None}
+                       for m, (low, high, avg) in values.items()}
+                }
+                for bucket, count, values in query_rollups(conn, resolution, start, end, metrics)
+            ]
+        
+        return jsonify({
+            "status": "success",
+            "resolution": resolution,
+            "from": epoch_timestamp(start),
+            "to": epoch_timestamp(end),
+            "data": buckets
+        })
+    
+    except Exception as e:
+        logger.error(f"Get history error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def get_decimated_history(start, end, points, metrics, method):
+    """Downsample raw readings in [start, end) with LTTB or min/max buckets."""
+    # NumPy is only loaded once a decimated history is first asked for
+    from decimate import decimate_series
+    
+    try:
+        with db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT ts_epoch, {', '.join(metrics)} FROM sensor_data "
+                "WHERE ts_epoch >= ? AND ts_epoch < ? ORDER BY ts_epoch",
+                (start, end)
+            )
+            rows = cursor.fetchall()
+        
+        columns = list(zip(*rows)) if rows else [()] * (len(metrics) + 1)
+        series = {}
+        for metric, values in zip(metrics, columns[1:]):
+            times, samples = decimate_series(columns[0], values, points, method)
+            series[metric] = [[epoch_timestamp(t), v] for t, v in zip(times.tolist(), samples.tolist())]
+        
+        return jsonify({
+            "status": "success",
+            "method": method,
+            "from": epoch_timestamp(start),
+            "to": epoch_timestamp(end),
+            "raw_points": len(rows),
+            "series": series
+        })
+    
+    except Exception as e:
+        logger.error(f"Get history error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.cli.command("backfill-recommendations")
+@click.option("--chunk-size", default=DEFAULT_CHUNK_SIZE, show_default=True,
+              help="Readings evaluated per batch.")
+def backfill_recommendations_command(chunk_size):
+    """Store watering recommendations for past sensor readings."""
+    init_db()
+    with closing(db.connect()) as conn:
+        # Stored recommendations use the exact analytic engine, never the lookup table
+        from fuzzy_logic import FuzzyWateringSystem
+        processed = backfill_recommendations(conn, FuzzyWateringSystem(cache_size=0), chunk_size)
+    click.echo(f"Backfilled {processed} readings")
+
+@app.cli.command("verify-stats")
+@click.option("--repair", is_flag=True, help="Rebuild the counters from a full scan if they disagree.")
+def verify_stats_command(repair):
+    """Reconcile the /api/stats counters against a full scan of sensor_data."""
+    init_db()
+    with closing(db.connect()) as conn:
+        # Take the write lock up front so ingest cannot commit between the
+        # scan and the repair
+        conn.execute("BEGIN IMMEDIATE")
+        problems = verify_stats(conn)
+        for problem in problems:
+            click.echo(problem)
+        if problems and repair:
+            rebuild_stats(conn)
+            conn.commit()
+            click.echo(f"Rebuilt counters after {len(problems)} mismatches")
+        elif problems:
+            raise click.ClickException(f"{len(problems)} mismatches, rerun with --repair to fix")
+        else:
+            click.echo("Counters match sensor_data")
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    """Precompress static assets and give stylesheets and scripts hashed names."""
+    manifest = build_static_assets(app.static_folder, STATIC_BUILD_DIR)
+    click.echo(f"Built {len(manifest)} hashed assets into {STATIC_BUILD_DIR}")
+
 def run_app():
     """Initialize and run the application."""
     init_db()
+    latest_readings.seed(SENSOR_DEVICE)
     
+    # Build the fuzzy engine while the server comes up
+    threading.Thread(target=warm_fuzzy_system, daemon=True).start()
+
+    # Start the batch writer before anything can queue readings
+    ingest_writer.start()
+    # atexit runs in reverse order: flush the ingest queue, then close the readers
+    atexit.register(db.close)
+    atexit.register(ingest_writer.stop)
+
     # Start MQTT in background
     mqtt_thread_instance = threading.Thread(target=mqtt_thread)
     mqtt_thread_instance.daemon = True
@@ -373,8 +736,17 @@ def run_app():
             minute=0,
             timezone=jakarta_tz
         )
+        
+        scheduler.add_job(
+            id='Refresh Rollups',
+            func=update_rollups,
+            trigger='interval',
+            seconds=ROLLUP_REFRESH_SECONDS,
+            next_run_time=datetime.now()
+        )
     
     # Start Flask
+    startup.mark("ready to serve")
     app.run(host='0.0.0.0', port=8000, debug=False)
 
 if __name__ == '__main__':
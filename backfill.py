@@ -0,0 +1,61 @@
+"""Backfill of watering recommendations for stored sensor readings."""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def init_recommendations_table(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS recommendations
+                 (reading_id INTEGER PRIMARY KEY,
+                  duration_ms INTEGER,
+                  status_code INTEGER)''')
+
+
+def backfill_recommendations(conn, fuzzy_system, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Compute recommendations for every reading that does not have one yet.
+
+    Readings are streamed in id order, ``chunk_size`` at a time, through
+    ``calculate_watering_batch``; each chunk is committed on its own, so an
+    interrupted run resumes after the last stored reading id. Rows that
+    could not be evaluated get ``duration_ms = -1`` and ``status_code = -1``.
+    Returns the number of readings processed.
+    """
+    # Only needed here; keeps numpy out of the web app's import time
+    import numpy as np
+
+    with conn:
+        init_recommendations_table(conn)
+    last_id = conn.execute("SELECT COALESCE(MAX(reading_id), 0) FROM recommendations").fetchone()[0]
+
+    processed = 0
+    started = time.perf_counter()
+    while True:
+        rows = conn.execute(
+            "SELECT id, soil_moisture, humidity, temperature FROM sensor_data "
+            "WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            break
+
+        ids, soil, hum, temp = zip(*rows)
+        result = fuzzy_system.calculate_watering_batch(
+            np.array(soil, dtype=np.float64),
+            np.array(hum, dtype=np.float64),
+            np.array(temp, dtype=np.float64)
+        )
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO recommendations (reading_id, duration_ms, status_code) VALUES (?, ?, ?)",
+                zip(ids, result['duration_ms'].tolist(), result['status_code'].tolist())
+            )
+
+        last_id = ids[-1]
+        processed += len(rows)
+        logger.info(f"Backfilled recommendations up to reading {last_id} ({processed} rows)")
+
+    logger.info(f"Backfill finished: {processed} rows in {time.perf_counter() - started:.2f}s")
+    return processed
@@ -0,0 +1,243 @@
+"""Response compression and precompressed, content-hashed static assets."""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import zlib
+
+from flask import abort, request, send_file, url_for
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/javascript", "application/x-ndjson",
+    "application/xml", "image/svg+xml", "font/ttf", "font/otf",
+    "application/vnd.ms-fontobject",
+}
+
+# Static files copied into the build; .css/.js also get content-hashed names
+ASSET_EXTENSIONS = {".css", ".js", ".svg", ".png", ".jpg", ".gif", ".ico",
+                    ".ttf", ".otf", ".eot", ".woff", ".woff2"}
+HASHED_EXTENSIONS = {".css", ".js"}
+MANIFEST = "manifest.json"
+
+
+def is_compressible(mimetype):
+    return mimetype is not None and (mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES)
+
+
+def negotiate_encoding(available=("br", "gzip")):
+    """Best encoding the client accepts out of ``available``, or None."""
+    for encoding in available:
+        if encoding == "br" and brotli is None:
+            continue
+        if request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def _compress_stream(chunks, encoding, level):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            # Sync-flush so every chunk reaches the client as soon as it is produced
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class ResponseCompressor:
+    """Compresses dynamic responses with brotli or gzip as the client prefers.
+
+    Buffered responses are compressed only above ``threshold`` bytes;
+    streamed responses (generators) are compressed chunk by chunk. Anything
+    already encoded, not textual, a file passthrough or an event stream is
+    left alone.
+    """
+
+    def __init__(self, app=None, threshold=1024, gzip_level=6, brotli_quality=4):
+        self.threshold = threshold
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.compress)
+
+    def compress(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough
+                or "Content-Encoding" in response.headers
+                or "Content-Range" in response.headers
+                or response.mimetype == "text/event-stream"
+                or not is_compressible(response.mimetype)):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+        level = self.brotli_quality if encoding == "br" else self.gzip_level
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), encoding, level)
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.threshold:
+                return response
+            if encoding == "br":
+                response.set_data(brotli.compress(body, quality=level))
+            else:
+                response.set_data(gzip.compress(body, level))
+
+        response.headers["Content-Encoding"] = encoding
+        # The compressed body is a different representation of the same data
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()[:10]
+
+
+def _write_compressed(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, 9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build_static_assets(static_dir, build_dir):
+    """Copy static assets into ``build_dir`` ready to be served long-term.
+
+    .css and .js files get the content hash in their name and are listed in
+    the manifest; other assets keep their names so relative references from
+    stylesheets (fonts, images) still resolve. Every compressible file gets
+    precompressed .gz (and, with brotli installed, .br) siblings. Returns
+    the manifest mapping original to built paths.
+    """
+    if os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+    manifest = {}
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            base, ext = os.path.splitext(name)
+            if ext.lower() not in ASSET_EXTENSIONS:
+                continue
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            if ext.lower() in HASHED_EXTENSIONS:
+                built = f"{os.path.dirname(relative)}/{base}.{_content_hash(source)}{ext}".lstrip("/")
+                manifest[relative] = built
+            else:
+                built = relative
+            target = os.path.join(build_dir, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            if is_compressible(mimetypes.guess_type(name)[0]):
+                _write_compressed(target)
+    with open(os.path.join(build_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+class StaticAssets:
+    """Serves the output of ``build_static_assets`` under ``url_prefix``.
+
+    Templates call ``asset_url(path)``: once the assets are built it points
+    at the content-hashed copy, which is cached for a year; without a build
+    it falls back to the plain /static URL. Built assets that keep their
+    names are served from here too, cached for ``unhashed_max_age``.
+    Precompressed siblings are sent
+    as-is when the client accepts them.
+    """
+
+    def __init__(self, app=None, build_dir="static_build", url_prefix="/assets",
+                 max_age=31536000, unhashed_max_age=86400):
+        self.build_dir = os.path.abspath(build_dir)
+        self.url_prefix = url_prefix
+        self.max_age = max_age
+        self.unhashed_max_age = unhashed_max_age
+        self.manifest = {}
+        self._hashed = set()
+        self._unhashed = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.load_manifest()
+        app.add_url_rule(f"{self.url_prefix}/<path:filename>", "assets", self.serve)
+        app.jinja_env.globals["asset_url"] = self.url
+
+    def load_manifest(self):
+        self._unhashed = set()
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+        else:
+            # Built assets that keep their names (images, fonts, ...)
+            for root, _, files in os.walk(self.build_dir):
+                for name in files:
+                    if os.path.splitext(name)[1].lower() not in ASSET_EXTENSIONS:
+                        continue
+                    relative = os.path.relpath(os.path.join(root, name), self.build_dir).replace(os.sep, "/")
+                    self._unhashed.add(relative)
+        self._hashed = set(self.manifest.values())
+        self._unhashed -= self._hashed
+        logger.info(f"Loaded {len(self.manifest)} hashed and {len(self._unhashed)} other static assets")
+
+    def url(self, path):
+        built = self.manifest.get(path)
+        if built is None:
+            if path in self._unhashed:
+                return f"{self.url_prefix}/{path}"
+            return url_for("static", filename=path)
+        return f"{self.url_prefix}/{built}"
+
+    def serve(self, filename):
+        path = os.path.normpath(os.path.join(self.build_dir, filename))
+        if not path.startswith(self.build_dir + os.sep) or not os.path.isfile(path):
+            abort(404)
+
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        encoding = negotiate_encoding(tuple(e for e, ext in (("br", ".br"), ("gzip", ".gz"))
+                                            if os.path.isfile(path + ext)))
+        hashed = filename in self._hashed
+        response = send_file(path + {"br": ".br", "gzip": ".gz"}.get(encoding, ""), mimetype=mimetype,
+                             max_age=self.max_age if hashed else self.unhashed_max_age, conditional=True)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        if hashed:
+            response.cache_control.immutable = True
+            response.cache_control.public = True
+        return response
@@ -0,0 +1,47 @@
+"""Conditional GET support for read APIs whose data only changes on ingest."""
+import functools
+import zlib
+
+from flask import Response, make_response, request
+
+
+def conditional_get(get_version):
+    """Answer If-None-Match / If-Modified-Since with 304 before running the view.
+
+    ``get_version`` returns (data_id, last_modified) for the current state of
+    the data, or None if it is not known yet (the view then runs as usual).
+    The ETag combines data_id with the query parameters, so a revalidation
+    that matches costs neither a database query nor serialization.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            version = get_version()
+            if version is None:
+                return view(*args, **kwargs)
+
+            data_id, last_modified = version
+            params = repr(sorted(request.args.items(multi=True))).encode()
+            etag = f"{data_id}-{zlib.crc32(params):08x}"
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = since is not None and last_modified <= since
+
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # Weak from the start: compression would weaken it on the 200
+            # but not on the 304, and the two have to match
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            # Caches may keep the response but have to revalidate it every time
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,81 @@
+"""SQLite connection management: tuned pragmas, WAL and connection reuse."""
+import calendar
+import logging
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 5000
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",  # readers never block the writer (and vice versa)
+    "PRAGMA synchronous = NORMAL",  # in WAL mode, fsync only at checkpoints
+    "PRAGMA cache_size = -32000",  # 32 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",  # read pages through a 256 MB memory map
+    "PRAGMA temp_store = MEMORY",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+)
+
+
+def epoch_seconds(dt):
+    """Epoch seconds of a naive local datetime, read as UTC.
+
+    Matches SQLite's strftime('%s', timestamp) on the stored TEXT timestamps,
+    which is how sensor_data.ts_epoch is defined.
+    """
+    return calendar.timegm(dt.timetuple())
+
+
+def epoch_timestamp(seconds):
+    """Inverse of ``epoch_seconds``, formatted like sensor_data.timestamp."""
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class Database:
+    """Hands out reusable, tuned SQLite connections.
+
+    ``reader()`` lends a ``query_only`` connection from a pool of idle ones.
+    Pooling (rather than one connection per thread) keeps connections open
+    across requests even though the development server starts a new thread
+    for every request. Writers (the ingest thread, migrations, CLI jobs)
+    open a connection of their own with ``connect()``.
+    """
+
+    def __init__(self, path, max_idle_readers=8):
+        self.path = path
+        self._idle_readers = queue.LifoQueue(maxsize=max_idle_readers)
+
+    def connect(self, readonly=False):
+        """Open a new tuned connection; the caller is responsible for closing it."""
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def reader(self):
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            conn = self.connect(readonly=True)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._idle_readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        """Close the idle pooled readers."""
+        while True:
+            try:
+                self._idle_readers.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,83 @@
+"""Server-side processing for the jQuery DataTables views.
+
+Implements the DataTables request/response protocol (draw, start, length,
+order, search) with paging, sorting and filtering done in SQL, so each
+request only reads one page of rows through an index.
+"""
+from datetime import datetime, timedelta
+
+from database import epoch_seconds
+
+# Column order of the tables in index.html and table.html
+COLUMNS = ("id", "timestamp", "temperature", "humidity", "soil_moisture")
+
+# The timestamp column sorts by its indexed epoch twin
+SORT_KEYS = {"timestamp": "ts_epoch"}
+
+# Prefixes of sensor_data.timestamp that map onto a ts_epoch range
+_TIME_PREFIXES = (
+    ("%Y-%m-%d %H:%M:%S", timedelta(seconds=1)),
+    ("%Y-%m-%d %H:%M", timedelta(minutes=1)),
+    ("%Y-%m-%d %H", timedelta(hours=1)),
+    ("%Y-%m-%d", timedelta(days=1)),
+)
+
+
+def _search_filter(value):
+    """Turn the global search box into an indexable WHERE clause.
+
+    Numbers match the id or any reading exactly, timestamp prefixes down
+    to the day become a ts_epoch range; anything else falls back to a
+    prefix match on the timestamp text.
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        pass
+    else:
+        return ("(id = ? OR temperature = ? OR humidity = ? OR soil_moisture = ?)",
+                [number, number, number, number])
+
+    for fmt, span in _TIME_PREFIXES:
+        try:
+            start = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return "(ts_epoch >= ? AND ts_epoch < ?)", [epoch_seconds(start), epoch_seconds(start + span)]
+
+    return "timestamp LIKE ?", [value.replace("%", "").replace("_", "") + "%"]
+
+
+def datatables_page(conn, args, total_records, max_length=1000):
+    """Build the DataTables JSON response for the request parameters in ``args``."""
+    draw = args.get("draw", 0, type=int)
+    start = max(args.get("start", 0, type=int), 0)
+    length = args.get("length", 25, type=int)
+    if length < 1 or length > max_length:
+        length = max_length
+
+    column = args.get("order[0][column]", 0, type=int)
+    name = COLUMNS[column] if 0 <= column < len(COLUMNS) else "id"
+    direction = "ASC" if args.get("order[0][dir]", "desc").lower() == "asc" else "DESC"
+    order = f"{SORT_KEYS.get(name, name)} {direction}, id {direction}"
+
+    search = args.get("search[value]", "").strip()
+    if search:
+        where, params = _search_filter(search)
+        where = f"WHERE {where}"
+        filtered = conn.execute(f"SELECT COUNT(*) FROM sensor_data {where}", params).fetchone()[0]
+    else:
+        where, params = "", []
+        filtered = total_records
+
+    rows = conn.execute(
+        f"SELECT {', '.join(COLUMNS)} FROM sensor_data {where} ORDER BY {order} LIMIT ? OFFSET ?",
+        params + [length, start]
+    ).fetchall()
+
+    return {
+        "draw": draw,
+        "recordsTotal": total_records,
+        "recordsFiltered": filtered,
+        "data": [list(row) for row in rows]
+    }
@@ -0,0 +1,87 @@
+"""Downsampling of time series for charts: LTTB and min/max buckets."""
+import numpy as np
+
+
+def lttb(x, y, points):
+    """Indices of ``points`` samples chosen by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last sample and, from every bucket in between, the
+    one forming the largest triangle with the previously kept sample and
+    the average of the next bucket, which preserves peaks and the overall
+    shape far better than taking every n-th sample.
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.array([0, n - 1])[:max(points, 0)]
+
+    # Bucket edges over the samples between the fixed first and last one
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    csum_x = np.concatenate(([0.], np.cumsum(x)))
+    csum_y = np.concatenate(([0.], np.cumsum(y)))
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the following bucket (the last sample for the final bucket)
+        next_lo, next_hi = (hi, edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        count = next_hi - next_lo
+        avg_x = (csum_x[next_hi] - csum_x[next_lo]) / count
+        avg_y = (csum_y[next_hi] - csum_y[next_lo]) / count
+
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(y, points):
+    """Indices of the minimum and maximum of ``points // 2`` equal buckets.
+
+    Every extreme survives, which is what matters for spotting spikes; the
+    pair from each bucket is returned in time order.
+    """
+    n = len(y)
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return np.arange(min(n, max(points, 0)))
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+
+    # Position of each bucket's extremes: first sample equal to the reduced value
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    low_idx = np.full(buckets, n, dtype=np.int64)
+    high_idx = np.full(buckets, n, dtype=np.int64)
+    samples = np.arange(n)
+    np.minimum.at(low_idx, bucket_of, np.where(y == lows[bucket_of], samples, n))
+    np.minimum.at(high_idx, bucket_of, np.where(y == highs[bucket_of], samples, n))
+
+    pairs = np.sort(np.stack([low_idx, high_idx], axis=1), axis=1).ravel()
+    # Flat buckets pick the same sample twice
+    return pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+
+
+METHODS = {
+    "lttb": lambda x, y, points: lttb(x, y, points),
+    "minmax": lambda x, y, points: minmax(y, points),
+}
+
+
+def decimate_series(times, values, points, method="lttb"):
+    """Reduce one series to at most ``points`` (time, value) samples.
+
+    ``times`` and ``values`` are equal-length sequences ordered by time;
+    missing values (None/NaN) are dropped first.
+    """
+    x = np.asarray(times, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(y)
+    x, y = x[present], y[present]
+    keep = METHODS[method](x, y, points)
+    return x[keep].astype(np.int64), y[keep]
@@ -0,0 +1,77 @@
+"""Streaming export of sensor_data as NDJSON or CSV."""
+import csv
+import io
+import json
+import zlib
+from contextlib import closing
+
+EXPORT_FIELDS = ("id", "timestamp", "temperature", "humidity", "soil_moisture")
+EXPORT_FETCH_SIZE = 1000
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _ndjson_chunks(rows):
+    for batch in rows:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), separators=(",", ":")) + "\n"
+            for row in batch
+        )
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    for batch in rows:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # nothing matched, still send the header
+        yield buffer.getvalue()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_readings(db, fmt, start=None, end=None, compress=False):
+    """Yield sensor readings in ``fmt``, oldest first, a batch at a time.
+
+    Rows are stepped through on a dedicated read-only connection with
+    ``fetchmany``, ordered by the ts_epoch index so SQLite never has to
+    sort, which keeps memory flat however many rows match.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("ts_epoch >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("ts_epoch < ?")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {', '.join(EXPORT_FIELDS)} FROM sensor_data {where} ORDER BY ts_epoch, id"
+
+    def batches():
+        with closing(db.connect(readonly=True)) as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                batch = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                if not batch:
+                    break
+                yield batch
+
+    chunks = (_ndjson_chunks if fmt == "ndjson" else _csv_chunks)(batches())
+    encoded = (chunk.encode("utf-8") for chunk in chunks)
+    return _gzip(encoded) if compress else encoded
@@ -0,0 +1,123 @@
+import numpy as np
+from skfuzzy.control.antecedent_consequent import accumulation_max
+from skfuzzy.control.term import TermAggregate
+
+
+def membership_knots(universe, mf):
+    """Reduce a sampled membership function to the points where its slope changes.
+
+    Linear interpolation between the knots reproduces the function exactly
+    on the universe, which is all skfuzzy's interp_membership ever does.
+    """
+    universe = np.asarray(universe, dtype=np.float64)
+    mf = np.asarray(mf, dtype=np.float64)
+    if universe.size < 3:
+        return universe, mf
+    slope = np.diff(mf) / np.diff(universe)
+    keep = np.ones(universe.size, dtype=bool)
+    keep[1:-1] = ~np.isclose(slope[1:], slope[:-1])
+    return universe[keep], mf[keep]
+
+
+class CompiledRules:
+    """Specialized evaluator for a list of skfuzzy rules.
+
+    Calling it with one value (scalar or array) per antecedent, in the order
+    given to ``compile_rules``, returns the clip level of every consequent
+    term, stacked along the last axis in ``output_labels`` order. ``source``
+    holds the generated Python for inspection.
+    """
+
+    def __init__(self, source, namespace, output_labels):
+        self.source = source
+        self.output_labels = output_labels
+        exec(compile(source, '<compiled fuzzy rules>', 'exec'), namespace)
+        self._evaluate = namespace['evaluate']
+
+    def __call__(self, *inputs):
+        return self._evaluate(*inputs)
+
+
+def compile_rules(rules, antecedents, consequent):
+    """Turn skfuzzy Rule objects into one fused NumPy function.
+
+    Every antecedent term used by the rules becomes a single ``np.interp``
+    over the knots of its membership function, AND/OR become the rule's
+    and/or functions (``np.fmin``/``np.fmax`` by default) and rule outputs
+    are accumulated per consequent term with the consequent's accumulation
+    method, exactly as skfuzzy's ControlSystemSimulation would, but without
+    its graph traversal and per-simulation bookkeeping.
+    """
+    namespace = {'np': np}
+    arguments = [f"x{i}" for i in range(len(antecedents))]
+    argument_of = {var.label: arg for var, arg in zip(antecedents, arguments)}
+    lines = []
+
+    for var, arg in zip(antecedents, arguments):
+        lines.append(f"{arg} = np.clip(np.asarray({arg}, dtype=np.float64), "
+                     f"{float(var.universe.min())!r}, {float(var.universe.max())!r})")
+
+    memberships = {}
+
+    def constant(value):
+        name = f"c{len(namespace)}"
+        namespace[name] = value
+        return name
+
+    def membership(term):
+        key = term.full_label
+        if key not in memberships:
+            var = term.parent
+            if var.label not in argument_of:
+                raise ValueError(f"Rule uses unknown antecedent {var.label!r}")
+            name = f"m{len(memberships)}"
+            xs, ys = membership_knots(var.universe, term.mf)
+            lines.append(f"{name} = np.interp({argument_of[var.label]}, "
+                         f"{constant(xs)}, {constant(ys)})  # {key}")
+            memberships[key] = name
+        return memberships[key]
+
+    def expression(term, rule):
+        if isinstance(term, TermAggregate):
+            first = expression(term.term1, rule)
+            if term.kind == 'not':
+                return f"(1. - {first})"
+            second = expression(term.term2, rule)
+            func = rule.and_func if term.kind == 'and' else rule.or_func
+            if func is np.fmin:
+                return f"np.fmin({first}, {second})"
+            if func is np.fmax:
+                return f"np.fmax({first}, {second})"
+            return f"{constant(func)}({first}, {second})"
+        return membership(term)
+
+    activations = {label: [] for label in consequent.terms}
+    for i, rule in enumerate(rules):
+        lines.append(f"r{i} = {expression(rule.antecedent, rule)}  # rule {i}")
+        for weighted in rule.consequent:
+            if weighted.term.parent is not consequent:
+                raise ValueError(f"Rule {i} does not conclude on {consequent.label!r}")
+            activation = f"r{i}" if weighted.weight == 1 else f"r{i} * {weighted.weight!r}"
+            activations[weighted.term.label].append(activation)
+
+    accumulate = consequent.accumulation_method
+    outputs = []
+    for label, terms in activations.items():
+        name = f"out{len(outputs)}"
+        if not terms:
+            value = "0."
+        elif len(terms) == 1:
+            value = terms[0]
+        elif accumulate is accumulation_max:
+            value = terms[0]
+            for other in terms[1:]:
+                value = f"np.fmax({value}, {other})"
+        else:
+            value = f"{constant(accumulate)}({', '.join(terms)})"
+        lines.append(f"{name} = {value}  # {label}")
+        outputs.append(name)
+    lines.append(f"return np.stack(np.broadcast_arrays({', '.join(outputs + arguments)})"
+                 f"[:{len(outputs)}], axis=-1)")
+
+    source = f"def evaluate({', '.join(arguments)}):\n" + "".join(f"    {line}\n" for line in lines)
+    return CompiledRules(source, namespace, list(activations))
@@ -0,0 +1,86 @@
+"""Optional process-pool offload for fuzzy inference.
+
+Each worker process builds its own FuzzyWateringSystem once and answers
+calculate_watering calls, so inference never holds the web process's GIL
+(and never stalls the request or MQTT threads).
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+_worker_system = None
+
+
+def _init_worker(options):
+    global _worker_system
+    from fuzzy_logic import FuzzyWateringSystem
+    _worker_system = FuzzyWateringSystem(**options)
+
+
+def _calculate_watering(soil, air, temp):
+    return _worker_system.calculate_watering(soil, air, temp)
+
+
+def _ping():
+    return _worker_system is not None
+
+
+class FuzzyExecutor:
+    """Small pool of worker processes, each holding a warmed fuzzy engine.
+
+    Workers are started with the ``spawn`` method: forking a process that
+    already runs the MQTT and scheduler threads is not safe.
+    """
+
+    def __init__(self, workers, options, timeout):
+        self.workers = workers
+        self.options = options
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.options,)
+        )
+
+    def submit(self, soil, air, temp):
+        """Queue a calculation; returns a Future of the calculate_watering dict."""
+        with self._lock:
+            return self._pool.submit(_calculate_watering, soil, air, temp)
+
+    def calculate_watering(self, soil, air, temp, timeout=None):
+        """Run calculate_watering in a worker, waiting at most ``timeout`` seconds."""
+        future = self.submit(soil, air, temp)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            future.cancel()
+            logger.error("Fuzzy worker timed out")
+            return {'error': 'Recommendation timed out'}
+        except BrokenProcessPool:
+            logger.error("Fuzzy worker pool broke, restarting it")
+            self._restart()
+            return {'error': 'Recommendation worker failed'}
+
+    def warm(self):
+        """Start every worker and wait until their engines are built."""
+        with self._lock:
+            futures = [self._pool.submit(_ping) for _ in range(self.workers)]
+        wait(futures)
+
+    def _restart(self):
+        with self._lock:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+
+    def shutdown(self):
+        with self._lock:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,147 @@
+"""Write-behind ingest: MQTT readings are queued and written in batches."""
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+INSERT_READING = (
+    "INSERT INTO sensor_data (timestamp, ts_epoch, temperature, humidity, soil_moisture) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+class IngestWriter:
+    """Bounded in-memory queue drained by one writer thread.
+
+    ``submit`` never blocks: when the queue is full the reading is dropped
+    and counted. The writer inserts up to ``batch_size`` readings per
+    transaction with ``executemany`` and flushes a partial batch once the
+    oldest queued reading has waited ``flush_interval`` seconds.
+    """
+
+    def __init__(self, db, batch_size=500, flush_interval=0.2, max_queue=10000):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        # (latest committed sensor_data.id, when it was committed); None until started
+        self.version = None
+        self._listeners = []
+
+    def submit(self, reading):
+        """Queue a (timestamp, ts_epoch, temperature, humidity, soil_moisture) tuple."""
+        try:
+            self.queue.put_nowait(reading)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            logger.warning("Ingest queue full, dropping sensor reading")
+            return False
+        with self._stats_lock:
+            self.enqueued += 1
+        return True
+
+    def add_listener(self, callback):
+        """Call ``callback(last_id)`` on the writer thread after every committed batch."""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the writer after flushing whatever is still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        with closing(self.db.connect()) as conn:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sensor_data").fetchone()[0]
+            self.version = (last_id, self._now())
+            while not (self._stop.is_set() and self.queue.empty()):
+                batch = self._next_batch()
+                if batch:
+                    self._write(conn, batch)
+
+    def _next_batch(self):
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn, batch):
+        started = time.perf_counter()
+        try:
+            with conn:
+                conn.executemany(INSERT_READING, batch)
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        except sqlite3.Error as e:
+            with self._stats_lock:
+                self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} sensor readings: {e}")
+            return
+
+        self.version = (last_id, self._now())
+        for callback in self._listeners:
+            try:
+                callback(last_id)
+            except Exception as e:
+                logger.error(f"Ingest listener {callback!r} failed: {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self.written += len(batch)
+            self.batches += 1
+            self.last_batch_size = len(batch)
+            self.last_flush_ms = round(elapsed_ms, 2)
+            self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        logger.debug(f"Wrote {len(batch)} sensor readings in {elapsed_ms:.1f} ms")
+
+    @staticmethod
+    def _now():
+        # HTTP dates have one-second resolution
+        return datetime.now(timezone.utc).replace(microsecond=0)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_batch_size": self.last_batch_size,
+                "avg_batch_size": round(self.written / self.batches, 1) if self.batches else 0,
+                "last_flush_ms": self.last_flush_ms,
+                "max_flush_ms": self.max_flush_ms
+            }
@@ -0,0 +1,70 @@
+"""Pluggable JSON encoding for Flask responses.
+
+``install_json_provider`` swaps Flask's stdlib-based provider for one
+backed by orjson when it is installed, falling back to the default.
+"""
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson.
+
+    Layout follows the default provider (sorted keys, compact unless
+    pretty-printing is on, trailing newline); bytes are produced directly
+    and NumPy arrays/scalars are serialized natively. Types orjson does not
+    know go through the default provider's ``default``.
+
+    The output is not byte-identical to the stdlib provider: non-ASCII
+    text is written as raw UTF-8 instead of ``\\uXXXX`` escapes, NaN and
+    Infinity become ``null`` instead of the non-standard ``NaN``/``Infinity``
+    tokens, and integers beyond 64 bits raise instead of being written.
+    """
+
+    def _options(self, indent=False):
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:  # e.g. separators or cls that orjson cannot honour
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if not kwargs else super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent)) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+PROVIDERS = {
+    "stdlib": DefaultJSONProvider,
+}
+if orjson is not None:
+    PROVIDERS["orjson"] = OrjsonProvider
+
+
+def install_json_provider(app, name="auto"):
+    """Use the named provider for ``app`` ("auto" picks the fastest available)."""
+    if name == "auto":
+        name = "orjson" if "orjson" in PROVIDERS else "stdlib"
+    if name not in PROVIDERS:
+        raise ValueError(f"JSON provider {name!r} is not available (have {', '.join(PROVIDERS)})")
+    app.json = PROVIDERS[name](app)
+    logger.info(f"Using {name} JSON provider")
+    return name
@@ -0,0 +1,59 @@
+"""In-process snapshot of the most recent sensor reading per device."""
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+Reading = namedtuple("Reading", "timestamp ts_epoch temperature humidity soil_moisture")
+
+
+class LatestReadings:
+    """Latest reading per device, fed by the ingest path.
+
+    Readers get an immutable ``Reading`` without locking or touching the
+    database: updates swap in a new dict. ``loader(device)`` is called at
+    most once per device, to seed the snapshot from the database after a
+    cold start.
+
+    ``version`` is (snapshot id, change time) and moves on every change, for
+    conditional GETs of responses built from the snapshot; it is None until
+    a reading is known.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._readings = {}
+        self._seeded = set()
+        self._lock = threading.Lock()
+        self._boot = format(int(time.time()), "x")
+        self._changes = 0
+        self.version = None
+
+    def _changed(self):
+        self._changes += 1
+        # HTTP dates have one-second resolution
+        self.version = (f"{self._boot}.{self._changes}",
+                        datetime.now(timezone.utc).replace(microsecond=0))
+
+    def update(self, device, reading):
+        with self._lock:
+            current = self._readings.get(device)
+            if current is None or reading.ts_epoch >= current.ts_epoch:
+                self._readings = {**self._readings, device: reading}
+                self._changed()
+            self._seeded.add(device)
+
+    def get(self, device):
+        reading = self._readings.get(device)
+        if reading is None and device not in self._seeded:
+            reading = self.seed(device)
+        return reading
+
+    def seed(self, device):
+        loaded = self._loader(device)
+        with self._lock:
+            self._seeded.add(device)
+            if loaded is not None and device not in self._readings:
+                self._readings = {**self._readings, device: loaded}
+                self._changed()
+            return self._readings.get(device)
@@ -0,0 +1,94 @@
+"""Versioned schema migrations, tracked in SQLite's PRAGMA user_version.
+
+Each migration runs once, in version order, and commits as it goes, so a
+migration that is interrupted (e.g. during a chunked backfill) simply
+resumes on the next start.
+"""
+import logging
+
+from rollup import create_rollup_tables
+from stats import create_stats_tables, rebuild_stats
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK_SIZE = 5000
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn):
+    """Apply every migration newer than the database's schema version."""
+    current = schema_version(conn)
+    for version, description, func in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info(f"Applying migration {version}: {description}")
+        func(conn)
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+        conn.commit()
+        current = version
+    return current
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+@migration(1, "indexed integer epoch column for sensor_data.timestamp")
+def add_timestamp_epoch(conn):
+    # ts_epoch holds the local wall-clock timestamp read as UTC, which is what
+    # strftime('%s', timestamp) yields; ranges and ordering are all that matter
+    if "ts_epoch" not in _columns(conn, "sensor_data"):
+        conn.execute("ALTER TABLE sensor_data ADD COLUMN ts_epoch INTEGER")
+        conn.commit()
+
+    # Backfill in id ranges, one short transaction each, so ingest can keep writing
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sensor_data").fetchone()[0]
+    for start in range(0, max_id, BACKFILL_CHUNK_SIZE):
+        conn.execute(
+            "UPDATE sensor_data SET ts_epoch = CAST(strftime('%s', timestamp) AS INTEGER) "
+            "WHERE id > ? AND id <= ? AND ts_epoch IS NULL",
+            (start, start + BACKFILL_CHUNK_SIZE)
+        )
+        conn.commit()
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sensor_data_ts_epoch ON sensor_data (ts_epoch)")
+    # Rows written without ts_epoch (e.g. by an older process) still get one
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS sensor_data_ts_epoch
+                 AFTER INSERT ON sensor_data WHEN NEW.ts_epoch IS NULL
+                 BEGIN
+                     UPDATE sensor_data SET ts_epoch = CAST(strftime('%s', NEW.timestamp) AS INTEGER)
+                     WHERE id = NEW.id;
+                 END''')
+
+
+@migration(2, "running totals and per-day counters for /api/stats")
+def add_running_stats(conn):
+    # Triggers and backfill commit together so no reading is counted twice or missed
+    conn.execute("BEGIN IMMEDIATE")
+    create_stats_tables(conn)
+    rebuild_stats(conn)
+
+
+@migration(3, "minute/hour/day rollup tables for history charts")
+def add_rollups(conn):
+    # Filled in by refresh_rollups, starting from the oldest reading
+    create_rollup_tables(conn)
+
+
+@migration(4, "indexes for sorting the data tables by reading")
+def add_reading_indexes(conn):
+    for column in ("temperature", "humidity", "soil_moisture"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_sensor_data_{column} ON sensor_data ({column})")
@@ -0,0 +1,98 @@
+"""In-process publish/subscribe fan-out for live sensor readings."""
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+
+
+class Subscription:
+    """One subscriber's bounded event buffer.
+
+    ``get`` returns the next (event_id, data) pair, or None if nothing was
+    published within ``timeout``. Once ``dropped`` is set the broadcaster
+    has given up on this subscriber because its buffer filled up.
+    """
+
+    def __init__(self, buffer_size):
+        self.queue = queue.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broadcaster:
+    """Fans published events out to every subscriber without blocking.
+
+    Event ids are ``<boot>-<sequence>``; the last ``history`` events are
+    kept so a client reconnecting with ``Last-Event-ID`` from this process
+    gets what it missed. Publishers never wait: a subscriber whose buffer
+    is full is dropped and is expected to reconnect and resume.
+    """
+
+    def __init__(self, history=1000, buffer_size=100):
+        self.buffer_size = buffer_size
+        self._boot = format(int(time.time()), "x")
+        self._sequence = itertools.count(1)
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, data):
+        with self._lock:
+            event = (f"{self._boot}-{next(self._sequence)}", data)
+            self._history.append(event)
+            self.published += 1
+            for subscription in list(self._subscribers):
+                try:
+                    subscription.queue.put_nowait(event)
+                except queue.Full:
+                    subscription.dropped = True
+                    self._subscribers.discard(subscription)
+                    self.dropped += 1
+        return event[0]
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber; returns (subscription, resumed).
+
+        ``resumed`` is True when every event after ``last_event_id`` could
+        be replayed into the buffer. Otherwise the caller should first send
+        the subscriber a fresh snapshot.
+        """
+        subscription = Subscription(self.buffer_size)
+        with self._lock:
+            missed = self._missed_since(last_event_id)
+            if missed is not None:
+                for event in missed[-self.buffer_size:]:
+                    subscription.queue.put_nowait(event)
+            self._subscribers.add(subscription)
+        resumed = missed is not None and len(missed) <= self.buffer_size
+        return subscription, resumed
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _missed_since(self, last_event_id):
+        boot, _, sequence = (last_event_id or "").partition("-")
+        if boot != self._boot or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        oldest = int(self._history[0][0].partition("-")[2]) if self._history else sequence + 1
+        if sequence < oldest - 1:
+            return None  # fell out of the history
+        return [e for e in self._history if int(e[0].partition("-")[2]) > sequence]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self.published,
+                "dropped_subscribers": self.dropped
+            }
@@ -0,0 +1,196 @@
+"""Cache of serialized API responses, invalidated whenever new data lands."""
+import functools
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import Response, make_response, request
+
+Entry = namedtuple("Entry", "generation expires body mimetype")
+
+
+class MemoryStore:
+    """LRU of cache entries inside this process."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self):
+        return self._generation
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class SQLiteStore:
+    """Cache entries in a local SQLite file shared by several worker processes.
+
+    The generation counter lives in the file too, so an invalidation by any
+    worker retires every worker's entries.
+    """
+
+    def __init__(self, path, maxsize=256):
+        self.maxsize = maxsize
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = OFF")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache_generation (id INTEGER PRIMARY KEY CHECK (id = 1), generation INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO cache_generation VALUES (1, 0)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS response_cache "
+                               "(key TEXT PRIMARY KEY, generation INTEGER, expires REAL, body BLOB, mimetype TEXT)")
+
+    def generation(self):
+        with self._lock:
+            return self._conn.execute("SELECT generation FROM cache_generation").fetchone()[0]
+
+    def invalidate(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("UPDATE cache_generation SET generation = generation + 1")
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.execute("COMMIT")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generation, expires, body, mimetype FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return Entry(*row) if row else None
+
+    def put(self, key, entry):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)", (key, *entry))
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key NOT IN "
+                "(SELECT key FROM response_cache ORDER BY expires DESC LIMIT ?)", (self.maxsize,)
+            )
+
+
+class ResponseCache:
+    """Serves repeated GETs from serialized bodies until data changes or ``ttl`` expires.
+
+    Concurrent misses for the same key are coalesced: one request computes
+    the response while the others wait for it and then read it from the
+    cache. Entries are tagged with the store generation read *before* the
+    computation, so a result that raced with an invalidation is never served.
+    """
+
+    def __init__(self, store, ttl=60.0, wait_timeout=10.0):
+        self.store = store
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def invalidate(self, *_):
+        self.store.invalidate()
+        with self._lock:
+            self.invalidations += 1
+
+    def _lookup(self, key, generation):
+        entry = self.store.get(key)
+        if entry is not None and entry.generation == generation and entry.expires > time.time():
+            return entry
+        return None
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_or_compute(self, key, compute):
+        """Return an Entry for ``key``, calling ``compute()`` on a miss.
+
+        ``compute`` returns a Flask response; only complete 200 responses
+        are cached, anything else is passed through as the second value.
+        """
+        generation = self.store.generation()
+        entry = self._lookup(key, generation)
+        if entry is not None:
+            self._count("hits")
+            return entry, None
+
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+
+        if not owner:
+            event.wait(self.wait_timeout)
+            entry = self._lookup(key, self.store.generation())
+            if entry is not None:
+                self._count("coalesced")
+                return entry, None
+
+        self._count("misses")
+        try:
+            response = compute()
+            if response.status_code != 200 or response.is_streamed:
+                return None, response
+            entry = Entry(generation, time.time() + self.ttl, response.get_data(), response.mimetype)
+            self.store.put(key, entry)
+            return entry, None
+        finally:
+            if owner:
+                with self._lock:
+                    del self._inflight[key]
+                event.set()
+
+    def cached(self, view=None, *, vary=None):
+        """Decorator caching a GET view per path and query parameters.
+
+        ``vary``, if given, is called per request and its result becomes
+        part of the key, for views that also depend on state the ingest
+        writer's invalidation does not cover.
+        """
+        if view is None:
+            return functools.partial(self.cached, vary=vary)
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = f"{request.path}?{sorted(request.args.items(multi=True))!r}"
+            if vary is not None:
+                key = f"{key}#{vary()!r}"
+            entry, response = self.get_or_compute(key, lambda: make_response(view(*args, **kwargs)))
+            if response is not None:
+                return response
+            return Response(entry.body, mimetype=entry.mimetype)
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses
+            return {
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0,
+                "generation": self.store.generation()
+            }
@@ -0,0 +1,129 @@
+"""Minute, hour and day rollups of sensor_data for charts and trends.
+
+sensor_rollup holds one row per (resolution, bucket) with the count, min,
+max and sum of every metric. ``refresh_rollups`` folds in only the rows
+whose id is past the watermark stored in rollup_state, so each run costs
+time proportional to what arrived since the previous one.
+"""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("temperature", "humidity", "soil_moisture")
+
+# Seconds per bucket, finest first
+RESOLUTIONS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+REFRESH_CHUNK_SIZE = 5000
+
+_STATE_KEY = "sensor_rollup"
+
+_AGGREGATES = ", ".join(
+    ["COUNT(*)"] + [f"COUNT({m}), MIN({m}), MAX({m}), TOTAL({m})" for m in METRICS]
+)
+
+_COLUMNS = ", ".join(
+    ["count"] + [f"{m}_count, {m}_min, {m}_max, {m}_sum" for m in METRICS]
+)
+
+
+def _merge(m):
+    # Multi-argument min()/max() return NULL if either side is NULL
+    return (
+        f"{m}_count = {m}_count + excluded.{m}_count, "
+        f"{m}_min = min(COALESCE({m}_min, excluded.{m}_min), COALESCE(excluded.{m}_min, {m}_min)), "
+        f"{m}_max = max(COALESCE({m}_max, excluded.{m}_max), COALESCE(excluded.{m}_max, {m}_max)), "
+        f"{m}_sum = {m}_sum + excluded.{m}_sum"
+    )
+
+
+UPSERT_ROLLUP = (
+    f"INSERT INTO sensor_rollup (resolution, bucket, {_COLUMNS}) "
+    f"SELECT ?, ts_epoch - ts_epoch % ?, {_AGGREGATES} FROM sensor_data "
+    f"WHERE id > ? AND id <= ? AND ts_epoch IS NOT NULL GROUP BY 2 "
+    f"ON CONFLICT (resolution, bucket) DO UPDATE SET count = count + excluded.count, "
+    + ", ".join(_merge(m) for m in METRICS)
+)
+
+
+def create_rollup_tables(conn):
+    columns = ", ".join(["count INTEGER NOT NULL"] + [
+        f"{m}_count INTEGER NOT NULL, {m}_min REAL, {m}_max REAL, {m}_sum REAL NOT NULL"
+        for m in METRICS
+    ])
+    conn.execute(f"CREATE TABLE IF NOT EXISTS sensor_rollup "
+                 f"(resolution INTEGER NOT NULL, bucket INTEGER NOT NULL, {columns}, "
+                 f"PRIMARY KEY (resolution, bucket)) WITHOUT ROWID")
+    conn.execute("CREATE TABLE IF NOT EXISTS rollup_state (name TEXT PRIMARY KEY, last_id INTEGER NOT NULL)")
+
+
+def refresh_rollups(conn, chunk_size=REFRESH_CHUNK_SIZE):
+    """Fold readings newer than the watermark into every resolution.
+
+    Each chunk of ids is rolled up and the watermark advanced in one
+    transaction, so an interrupted refresh resumes where it stopped and
+    never counts a reading twice. Returns the number of readings folded in.
+    """
+    started = time.perf_counter()
+    processed = 0
+    while True:
+        with conn:
+            row = conn.execute("SELECT last_id FROM rollup_state WHERE name = ?", (_STATE_KEY,)).fetchone()
+            last_id = row[0] if row else 0
+            end_id, count = conn.execute(
+                "SELECT MAX(id), COUNT(*) FROM (SELECT id FROM sensor_data WHERE id > ? ORDER BY id LIMIT ?)",
+                (last_id, chunk_size)
+            ).fetchone()
+            if not count:
+                break
+            for seconds in RESOLUTIONS.values():
+                conn.execute(UPSERT_ROLLUP, (seconds, seconds, last_id, end_id))
+            conn.execute(
+                "INSERT INTO rollup_state (name, last_id) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id",
+                (_STATE_KEY, end_id)
+            )
+        processed += count
+
+    if processed:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Rolled up {processed} readings in {elapsed_ms:.1f} ms")
+    return processed
+
+
+def choose_resolution(start, end, points):
+    """Finest resolution whose bucket count for [start, end) fits in ``points``.
+
+    Falls back to the coarsest resolution when even that would exceed the
+    budget, so callers always get an answer.
+    """
+    span = max(end - start, 1)
+    for name, seconds in RESOLUTIONS.items():
+        if span / seconds <= points:
+            return name
+    return name
+
+
+def query_rollups(conn, resolution, start, end, metrics=METRICS):
+    """Buckets of ``resolution`` starting in [start, end), oldest first.
+
+    Yields (bucket, count, {metric: (min, max, avg)}) tuples.
+    """
+    seconds = RESOLUTIONS[resolution]
+    columns = ", ".join(f"{m}_count, {m}_min, {m}_max, {m}_sum" for m in metrics)
+    rows = conn.execute(
+        f"SELECT bucket, count, {columns} FROM sensor_rollup "
+        f"WHERE resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+        (seconds, start - start % seconds, end)
+    )
+    for row in rows:
+        values = {}
+        for i, m in enumerate(metrics):
+            count, low, high, total = row[2 + 4 * i:6 + 4 * i]
+            values[m] = (low, high, total / count if count else None)
+        yield row[0], row[1], values
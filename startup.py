@@ -0,0 +1,61 @@
+"""Cold-start timing for the web process.
+
+Records how long the heavy imports and one-off setup steps take so that
+container restarts can be tracked. For a full per-module breakdown run
+``python -X importtime app.py``.
+"""
+import importlib
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_started = time.perf_counter()
+_lock = threading.Lock()
+_imports = {}
+_phases = {}
+
+
+def _elapsed_ms(since):
+    return round((time.perf_counter() - since) * 1000, 1)
+
+
+def timed_import(name):
+    """Import a module, recording how long it took if it was not loaded yet."""
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        _imports[name] = _elapsed_ms(start)
+    return module
+
+
+@contextmanager
+def phase(name):
+    """Record the duration of a setup step."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _phases[name] = _elapsed_ms(start)
+        logger.info(f"Startup: {name} took {_phases[name]} ms")
+
+
+def mark(name):
+    """Record the time from process start (this module's import) to now."""
+    with _lock:
+        _phases[name] = _elapsed_ms(_started)
+
+
+def report():
+    with _lock:
+        return {
+            "uptime_ms": _elapsed_ms(_started),
+            "imports_ms": dict(_imports),
+            "phases_ms": dict(_phases)
+        }
@@ -0,0 +1,119 @@
+"""Running aggregates over sensor_data, kept current by triggers.
+
+sensor_stats holds one row of totals and sensor_stats_daily one row per
+local calendar day. Both are updated by triggers on sensor_data, i.e. in
+the same transaction as the insert that changes them, so /api/stats can
+answer from a couple of primary-key lookups instead of scanning history.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("temperature", "humidity", "soil_moisture")
+
+_COLUMNS = ", ".join(["count"] + [f"{m}_count, {m}_sum" for m in METRICS])
+
+_AGGREGATES = ", ".join(
+    ["COUNT(*)"] + [f"COUNT({m}), TOTAL({m})" for m in METRICS]
+)
+
+# Float sums drift a little from a fresh TOTAL() over the same rows
+SUM_TOLERANCE = 1e-6
+
+
+def _delta(row, sign):
+    """SQL expressions adding (sign=+) or removing (sign=-) one trigger row."""
+    values = [f"{sign}1"]
+    for m in METRICS:
+        values.append(f"{sign}({row}.{m} IS NOT NULL)")
+        values.append(f"{sign}COALESCE({row}.{m}, 0)")
+    return values
+
+
+def _apply(row, sign):
+    names = _COLUMNS.split(", ")
+    values = _delta(row, sign)
+    assignments = ", ".join(f"{n} = {n} + ({v})" for n, v in zip(names, values))
+    return (
+        f"INSERT INTO sensor_stats_daily (day, {_COLUMNS}) "
+        f"VALUES (substr({row}.timestamp, 1, 10), {', '.join(values)}) "
+        f"ON CONFLICT (day) DO UPDATE SET {assignments};\n"
+        f"UPDATE sensor_stats SET {assignments} WHERE id = 1;"
+    )
+
+
+def create_stats_tables(conn):
+    columns = ", ".join(["count INTEGER NOT NULL DEFAULT 0"] + [
+        f"{m}_count INTEGER NOT NULL DEFAULT 0, {m}_sum REAL NOT NULL DEFAULT 0" for m in METRICS
+    ])
+    conn.execute(f"CREATE TABLE IF NOT EXISTS sensor_stats "
+                 f"(id INTEGER PRIMARY KEY CHECK (id = 1), {columns})")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS sensor_stats_daily (day TEXT PRIMARY KEY, {columns})")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS sensor_stats_insert AFTER INSERT ON sensor_data "
+                 f"BEGIN {_apply('NEW', '+')} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS sensor_stats_delete AFTER DELETE ON sensor_data "
+                 f"BEGIN {_apply('OLD', '-')} END")
+
+
+def rebuild_stats(conn):
+    """Recompute both stats tables from a full scan of sensor_data.
+
+    Must run inside the caller's transaction so no insert lands between
+    the scan and the rewrite.
+    """
+    conn.execute("DELETE FROM sensor_stats")
+    conn.execute("DELETE FROM sensor_stats_daily")
+    conn.execute(f"INSERT INTO sensor_stats (id, {_COLUMNS}) SELECT 1, {_AGGREGATES} FROM sensor_data")
+    conn.execute(f"INSERT INTO sensor_stats_daily (day, {_COLUMNS}) "
+                 f"SELECT substr(timestamp, 1, 10), {_AGGREGATES} FROM sensor_data "
+                 f"GROUP BY substr(timestamp, 1, 10)")
+
+
+def _averages(row):
+    averages = {}
+    for i, m in enumerate(METRICS):
+        count, total = row[1 + 2 * i], row[2 + 2 * i]
+        averages[m] = total / count if count else None
+    return averages
+
+
+def count_readings(conn):
+    row = conn.execute("SELECT count FROM sensor_stats WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def read_stats(conn, day):
+    """Return (total count, per-metric averages, count for ``day``)."""
+    totals = conn.execute(f"SELECT {_COLUMNS} FROM sensor_stats WHERE id = 1").fetchone()
+    if totals is None:
+        return 0, {m: None for m in METRICS}, 0
+    today = conn.execute("SELECT count FROM sensor_stats_daily WHERE day = ?", (day,)).fetchone()
+    return totals[0], _averages(totals), today[0] if today else 0
+
+
+def _mismatches(label, stored, expected):
+    problems = []
+    for name, a, b in zip(_COLUMNS.split(", "), stored or (), expected or ()):
+        if name.endswith("_sum"):
+            if abs(a - b) > SUM_TOLERANCE * max(1.0, abs(b)):
+                problems.append(f"{label} {name}: stored {a!r}, actual {b!r}")
+        elif a != b:
+            problems.append(f"{label} {name}: stored {a}, actual {b}")
+    if (stored is None) != (expected is None):
+        problems.append(f"{label}: stored {stored!r}, actual {expected!r}")
+    return problems
+
+
+def verify_stats(conn):
+    """Reconcile the stats tables against a full scan; returns a list of mismatches."""
+    stored = conn.execute(f"SELECT {_COLUMNS} FROM sensor_stats WHERE id = 1").fetchone()
+    expected = conn.execute(f"SELECT {_AGGREGATES} FROM sensor_data").fetchone()
+    problems = _mismatches("total", stored, expected)
+
+    stored_days = {row[0]: row[1:] for row in conn.execute(
+        f"SELECT day, {_COLUMNS} FROM sensor_stats_daily WHERE count != 0")}
+    expected_days = {row[0]: row[1:] for row in conn.execute(
+        f"SELECT substr(timestamp, 1, 10), {_AGGREGATES} FROM sensor_data GROUP BY 1")}
+    for day in sorted(stored_days.keys() | expected_days.keys()):
+        problems.extend(_mismatches(day, stored_days.get(day), expected_days.get(day)))
+    return problems